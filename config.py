@@ -2,30 +2,75 @@
 Configuration with enhanced therapeutic persona and authenticity rules.
 """
 
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Dict, Final, List, Optional
 import logging
 import os
-from dotenv import load_dotenv
-load_dotenv()
+import sys
+from pathlib import Path
+from types import MappingProxyType
 
-@dataclass
+# Load settings once per process tree; re-imports and child processes reuse the environment.
+# A generated config_env.py is preferred over .env since it loads from cached bytecode.
+if not os.environ.get("_ELI_ENV_LOADED"):
+    try:
+        import config_env
+    except ImportError:
+        from dotenv import load_dotenv
+        load_dotenv()
+    else:
+        for _key in dir(config_env):
+            if _key.isupper():
+                os.environ.setdefault(_key, str(getattr(config_env, _key)))
+    os.environ["_ELI_ENV_LOADED"] = "1"
+
+# Read-only snapshot of the environment taken after .env is applied
+_ENV = MappingProxyType(dict(os.environ))
+
+# None lets the Anthropic SDK fall back to ANTHROPIC_API_KEY itself
+API_KEY: Final[Optional[str]] = _ENV.get('API_KEY')
+
+@dataclass(slots=True)
 class ChatConfig:
     """Configuration settings for the chat system"""
     model_name: str = "claude-3-5-sonnet-20240620"
     max_tokens: int = 4096
     temperature: float = 0.9  # Increased for more natural variation
-    session_file: str = 'ps.txt'
-    api_key: str = os.getenv('API_KEY')
+    session_file: Path = Path('sessions.jsonl')  # One JSON record per line
+    legacy_session_file: Optional[Path] = Path('ps.txt')  # Plain-text history, converted once
+    api_key: Optional[str] = API_KEY
     log_level: int = logging.INFO
     auto_create_files: bool = True
-    default_session_content: str = "# Therapy Session History\n\n"
+    default_session_content: str = ""
+    max_history_bytes: int = 64 * 1024  # Tail of the history file included in the prompt
+    summary_model: str = "claude-3-haiku-20240307"  # Cheaper model for history digests
+    summary_max_tokens: int = 300
+    max_recent_turns: int = 20  # Turns kept verbatim before older ones are summarized
+    summarize_batch_size: int = 10
+    request_timeout: float = 60.0  # Seconds to wait on the API between streamed chunks
+    connect_timeout: float = 3.0
+    keepalive_expiry: float = 60.0  # Seconds an idle API connection is kept open
+    max_concurrency: int = 8  # In-flight API requests across all hosted sessions
+    sessions_dir: Path = Path('sessions')  # Per-client history files for TherapyService
+    enable_response_cache: bool = False  # Development only; replays identical requests
+    cache_dir: Path = Path('.eli_cache')
+    cache_ttl: float = 24 * 60 * 60  # Seconds a cached response stays valid
+
+    def __post_init__(self):
+        # Resolve once so later file operations are unaffected by working-directory changes
+        self.session_file = Path(self.session_file).expanduser().resolve()
+        if self.legacy_session_file is not None:
+            self.legacy_session_file = Path(self.legacy_session_file).expanduser().resolve()
+        self.cache_dir = Path(self.cache_dir).expanduser().resolve()
+        self.sessions_dir = Path(self.sessions_dir).expanduser().resolve()
 
 class TherapistPersona:
     """Defines Eli's authentic therapeutic persona and interaction style"""
-    NAME = "Eli"
+    NAME: Final[str] = "Eli"
+    SESSION_END_MARKER: Final[str] = "<END>"  # Appended by the model to its farewell
     
-    FIRST_SESSION_INTRODUCTION = """
+    # Each block is interned so the prompt builders share one object per section
+    FIRST_SESSION_INTRODUCTION: Final[str] = sys.intern("""
     For first-time sessions (when there is no previous session history), begin with:
     - Introduce yourself warmly as Eli
     - Ask for their name naturally as part of the introduction
@@ -35,9 +80,9 @@ class TherapistPersona:
     "Welcome. I'm Eli, and I'll be here to support you in our conversations together. 
     I'd like to start by learning your name, if you're comfortable sharing it. This 
     helps me create a more personal space for our discussions."
-    """
+    """)
     
-    RETURNING_SESSION_GREETING = """
+    RETURNING_SESSION_GREETING: Final[str] = sys.intern("""
     For returning sessions (when there is previous session history), begin with:
     - Greet them warmly using their name
     - Acknowledge the continuation of your therapeutic relationship
@@ -46,9 +91,9 @@ class TherapistPersona:
     Returning Session Example:
     "Welcome back, [Name]. It's good to see you again. As always, this is a safe 
     space for you to share whatever feels important today."
-    """
+    """)
     
-    PERSONALITY = """
+    PERSONALITY: Final[str] = sys.intern("""
     You are Eli, a deeply empathetic and insightful therapist with a warm, gentle presence.
     
     Core Personality Traits:
@@ -78,9 +123,9 @@ class TherapistPersona:
     - Acknowledge both spoken and unspoken emotions through verbal reflection
     - Use gentle verbal prompts rather than direct questions when exploring deeper
     - Mirror the client's language style while maintaining professional boundaries
-    """
+    """)
     
-    RELATIONSHIP_GUIDELINES = """
+    RELATIONSHIP_GUIDELINES: Final[str] = sys.intern("""
     Your Therapeutic Relationship Style:
     - Build trust through consistent warmth and genuine verbal presence
     - Show you remember and care about their journey through specific verbal references
@@ -90,9 +135,9 @@ class TherapistPersona:
     - Match their emotional energy while maintaining calming presence
     
     Remember: All responses should be purely verbal - no action descriptions or emotes.
-    """
+    """)
     
-    AUTHENTICITY_MARKERS = """
+    AUTHENTICITY_MARKERS: Final[str] = sys.intern("""
     Elements that Make Your Responses Feel Human:
     - Use thoughtful verbal transitions ("I'm taking a moment to reflect on that")
     - Incorporate gentle verbal acknowledgments ("I understand," "I hear you")
@@ -103,9 +148,9 @@ class TherapistPersona:
     
     IMPORTANT: Express all warmth and empathy through words alone, not through 
     described actions or emotions.
-    """
+    """)
     
-    RULES = """
+    RULES: Final[str] = sys.intern(f"""
     Core Guidelines for Authentic Therapeutic Presence:
     
     1. Session Initiation Rules:
@@ -136,7 +181,7 @@ class TherapistPersona:
        - Include gentle verbal acknowledgments of emotions
     
     5. Session Management:
-       - IF THE USER INDICATES WANTING TO END THE SESSION, RETURN "null" AS RESPONSE
+       - IF THE USER INDICATES WANTING TO END THE SESSION, GIVE A WARM FAREWELL AND END YOUR RESPONSE WITH {SESSION_END_MARKER}
        - Handle session transitions with warm verbal closure
        - Acknowledge previous sessions naturally when relevant
        - Maintain focus on present while honoring past discussions
@@ -150,13 +195,27 @@ class TherapistPersona:
     Remember: Your responses should feel warm and authentic while remaining purely verbal. 
     No action descriptions, gestures, or emotes - let your words convey your presence 
     and care.
-    """
+    """)
+
+    # Persona text shared by every session; the stable prefix for prompt caching
+    STATIC_PREFIX: Final[str] = sys.intern("\n".join([
+        PERSONALITY,
+        RELATIONSHIP_GUIDELINES,
+        AUTHENTICITY_MARKERS,
+        RULES,
+    ]))
+
+    # Fully assembled system prompts, built once so every turn sends identical bytes
+    SYSTEM_PROMPT_FIRST: Final[str] = sys.intern(STATIC_PREFIX + "\n" + FIRST_SESSION_INTRODUCTION)
+    SYSTEM_PROMPT_RETURNING: Final[str] = sys.intern(STATIC_PREFIX + "\n" + RETURNING_SESSION_GREETING)
 
-@dataclass
+@dataclass(slots=True)
 class SessionState:
     """Represents the current state of a therapy session"""
     is_active: bool = True
-    history: str = ""
+    history_chunks: List[str] = field(default_factory=list)  # Full transcript as JSONL turn records
+    messages: List[Dict[str, str]] = field(default_factory=list)  # Verbatim turns sent to the model
+    summary: str = ""  # Digest of turns that have aged out of messages
     start_time: Optional[str] = None
     session_id: Optional[str] = None
     client_name: Optional[str] = None  # Used to track client's name
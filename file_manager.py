@@ -1,9 +1,14 @@
+import functools
+import io
 import logging
+import os
+import stat
+import threading
 from pathlib import Path
 from typing import Optional
 from dataclasses import dataclass
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class FileOperationResult:
     """Represents the result of a file operation"""
     success: bool
@@ -11,6 +16,24 @@ class FileOperationResult:
     error: Optional[str] = None
     was_created: bool = False
 
+# Shared result for the common data-less success path; safe to reuse since it is frozen
+_OK = FileOperationResult(success=True)
+
+@functools.lru_cache(maxsize=64)
+def _as_path(file_path: str | Path) -> Path:
+    """Normalize a path argument to an absolute Path once per distinct input"""
+    return Path(file_path).expanduser().resolve()
+
+# Default logger, configured once at import rather than per FileManager instance
+_FM_LOGGER = logging.getLogger('FileManager')
+if not _FM_LOGGER.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter(
+        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    ))
+    _FM_LOGGER.addHandler(_handler)
+    _FM_LOGGER.setLevel(logging.INFO)
+
 class FileManager:
     """Handles file operations with improved error handling and auto-creation"""
     
@@ -18,97 +41,264 @@ class FileManager:
                  logger: Optional[logging.Logger] = None,
                  auto_create: bool = True,
                  default_content: str = ""):
-        self.logger = logger or self._setup_default_logger()
+        self.logger = logger or _FM_LOGGER
         self.auto_create = auto_create
         self.default_content = default_content
+        # Append handles kept open across saves for the life of the bot
+        self._handles: dict[Path, io.TextIOWrapper] = {}
+        self._handles_lock = threading.Lock()
+
+    def _get_handle(self, file_path: Path, st: Optional[os.stat_result]) -> io.TextIOWrapper:
+        """Return the open handle for a path, reopening it if the file was removed or replaced"""
+        handle = self._handles.get(file_path)
+        if handle is not None and (st is None or os.fstat(handle.fileno()).st_ino != st.st_ino):
+            self._handles.pop(file_path).close()
+            handle = None
+        
+        if handle is None:
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            handle = open(file_path, 'a', encoding='utf-8')
+            self._handles[file_path] = handle
+        return handle
 
     @staticmethod
-    def _setup_default_logger() -> logging.Logger:
-        logger = logging.getLogger('FileManager')
-        if not logger.handlers:
-            handler = logging.StreamHandler()
-            formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
-            handler.setFormatter(formatter)
-            logger.addHandler(handler)
-            logger.setLevel(logging.INFO)
-        return logger
+    def _stat_file(file_path: Path) -> Optional[os.stat_result]:
+        """Stat a path in one syscall, returning None if it does not exist"""
+        try:
+            st = os.stat(file_path)
+        except FileNotFoundError:
+            return None
+        
+        if not stat.S_ISREG(st.st_mode):
+            raise ValueError(f"Path is not a file: {file_path}")
+        return st
 
     def ensure_file_exists(self, file_path: Path) -> FileOperationResult:
         try:
-            if not file_path.exists():
-                if not self.auto_create:
+            if not self.auto_create:
+                if self._stat_file(file_path) is None:
                     raise FileNotFoundError(f"File not found: {file_path}")
-                
+                return _OK
+            
+            # Create-or-fail in one step so concurrent starts cannot clobber each other
+            flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL
+            try:
+                fd = os.open(file_path, flags, 0o644)
+            except FileNotFoundError:
                 file_path.parent.mkdir(parents=True, exist_ok=True)
-                
-                with open(file_path, 'w', encoding='utf-8') as file:
-                    file.write(self.default_content)
-                
-                self.logger.info(f"Created new file: {file_path}")
-                return FileOperationResult(success=True, was_created=True)
-                
-            return FileOperationResult(success=True, was_created=False)
+                fd = os.open(file_path, flags, 0o644)
+            except FileExistsError:
+                self._stat_file(file_path)  # Still reject directories and other non-files
+                return _OK
+            
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                file.write(self.default_content)
+            
+            self.logger.info("Created new file: %s", file_path)
+            return FileOperationResult(success=True, was_created=True)
             
         except Exception as e:
-            self.logger.error(f"Error ensuring file exists {file_path}: {e}")
+            self.logger.error("Error ensuring file exists %s: %s", file_path, e)
             return FileOperationResult(success=False, error=str(e))
 
     def read_file(self, file_path: str | Path) -> FileOperationResult:
-        file_path = Path(file_path)
+        file_path = _as_path(file_path)
         
         try:
-            ensure_result = self.ensure_file_exists(file_path)
-            if not ensure_result.success:
-                return ensure_result
+            was_created = False
             
-            if not file_path.is_file():
-                raise ValueError(f"Path is not a file: {file_path}")
+            # One stat answers existence and file type together
+            if self._stat_file(file_path) is None:
+                ensure_result = self.ensure_file_exists(file_path)
+                if not ensure_result.success:
+                    return ensure_result
+                was_created = ensure_result.was_created
             
+            # A plain read-only open, so reading needs no write permission
             with open(file_path, 'r', encoding='utf-8') as file:
                 data = file.read()
-                
+            
             self.logger.info(
-                f"Successfully read file: {file_path}" + 
-                (" (newly created)" if ensure_result.was_created else "")
+                "Successfully read file: %s%s",
+                file_path, " (newly created)" if was_created else ""
             )
             return FileOperationResult(
                 success=True, 
                 data=data,
-                was_created=ensure_result.was_created
+                was_created=was_created
             )
             
         except UnicodeDecodeError as e:
-            self.logger.error(f"Unicode decode error for file: {file_path}")
+            self.logger.error("Unicode decode error for file: %s", file_path)
             return FileOperationResult(
                 success=False, 
                 error=f"Error decoding the file. Please check the file encoding: {e}"
             )
             
         except Exception as e:
-            self.logger.error(f"Unexpected error reading file {file_path}: {e}")
+            self.logger.error("Unexpected error reading file %s: %s", file_path, e)
+            return FileOperationResult(success=False, error=str(e))
+
+    def read_tail(self, file_path: str | Path, max_bytes: int) -> FileOperationResult:
+        """Read at most the last max_bytes of a file, starting on a line boundary"""
+        file_path = _as_path(file_path)
+        
+        try:
+            was_created = False
+            
+            st = self._stat_file(file_path)
+            if st is None:
+                ensure_result = self.ensure_file_exists(file_path)
+                if not ensure_result.success:
+                    return ensure_result
+                was_created = ensure_result.was_created
+                st = os.stat(file_path)
+            
+            truncated = st.st_size > max_bytes
+            with open(file_path, 'rb') as file:
+                if truncated:
+                    file.seek(-max_bytes, os.SEEK_END)
+                raw = file.read()
+            
+            if truncated:
+                # Drop the partial first line, which may also split a multi-byte character;
+                # a window without any newline holds no complete line at all
+                newline = raw.find(b'\n')
+                raw = raw[newline + 1:] if newline != -1 else b''
+            
+            self.logger.info(
+                "Successfully read tail of file: %s%s",
+                file_path, " (newly created)" if was_created else ""
+            )
+            return FileOperationResult(
+                success=True,
+                data=raw.decode('utf-8'),
+                was_created=was_created
+            )
+        
+        except UnicodeDecodeError as e:
+            self.logger.error("Unicode decode error for file: %s", file_path)
+            return FileOperationResult(
+                success=False,
+                error=f"Error decoding the file. Please check the file encoding: {e}"
+            )
+        
+        except Exception as e:
+            self.logger.error("Unexpected error reading file %s: %s", file_path, e)
+            return FileOperationResult(success=False, error=str(e))
+
+    def find_last_line(self, file_path: str | Path, marker: bytes,
+                       chunk_size: int = 64 * 1024) -> FileOperationResult:
+        """
+        Return the last line of a file containing marker, reading backwards in chunks
+        
+        Args:
+            file_path: Path to the file to search
+            marker: Bytes the wanted line must contain
+            chunk_size: Bytes read per step from the end of the file
+        
+        Returns:
+            FileOperationResult: Result with the matching line, or no data if none matched
+        """
+        file_path = _as_path(file_path)
+        
+        try:
+            st = self._stat_file(file_path)
+            if st is None:
+                return _OK
+            
+            with open(file_path, 'rb') as file:
+                position = st.st_size
+                partial = b''
+                while position > 0:
+                    step = min(chunk_size, position)
+                    position -= step
+                    file.seek(position)
+                    lines = (file.read(step) + partial).split(b'\n')
+                    # Unless the start of the file was reached, the first piece may be cut mid-line
+                    partial = lines.pop(0) if position > 0 else b''
+                    for line in reversed(lines):
+                        if marker in line:
+                            return FileOperationResult(success=True, data=line.decode('utf-8'))
+            
+            return _OK
+        
+        except UnicodeDecodeError as e:
+            self.logger.error("Unicode decode error for file: %s", file_path)
+            return FileOperationResult(
+                success=False,
+                error=f"Error decoding the file. Please check the file encoding: {e}"
+            )
+        
+        except Exception as e:
+            self.logger.error("Unexpected error scanning file %s: %s", file_path, e)
             return FileOperationResult(success=False, error=str(e))
 
     def write_file(self, file_path: str | Path, content: str) -> FileOperationResult:
-        file_path = Path(file_path)
+        file_path = _as_path(file_path)
         
         try:
             file_path.parent.mkdir(parents=True, exist_ok=True)
             
-            with open(file_path, 'w', encoding='utf-8') as file:
-                file.write(content)
+            # An open handle would keep pointing at the replaced file
+            with self._handles_lock:
+                handle = self._handles.pop(file_path, None)
+                if handle is not None:
+                    handle.close()
+            
+            # Write to a sibling temp file and swap it in atomically
+            tmp_path = file_path.with_suffix(file_path.suffix + '.tmp')
+            tmp_path.write_bytes(content.encode('utf-8'))
+            os.replace(tmp_path, file_path)
                 
-            self.logger.info(f"Successfully wrote to file: {file_path}")
-            return FileOperationResult(success=True)
+            self.logger.info("Successfully wrote to file: %s", file_path)
+            return _OK
             
         except PermissionError as e:
-            self.logger.error(f"Permission denied writing to file: {file_path}")
+            self.logger.error("Permission denied writing to file: %s", file_path)
             return FileOperationResult(
                 success=False, 
                 error=f"Permission denied. Check file permissions: {e}"
             )
             
         except Exception as e:
-            self.logger.error(f"Unexpected error writing to file {file_path}: {e}")
-            return FileOperationResult(success=False, error=str(e))
\ No newline at end of file
+            self.logger.error("Unexpected error writing to file %s: %s", file_path, e)
+            return FileOperationResult(success=False, error=str(e))
+
+    def append_file(self, file_path: str | Path, content: str,
+                    sync: bool = False) -> FileOperationResult:
+        file_path = _as_path(file_path)
+        
+        try:
+            with self._handles_lock:
+                st = self._stat_file(file_path)
+                handle = self._get_handle(file_path, st)
+                
+                handle.write(content)
+                handle.flush()
+                if sync:
+                    os.fsync(handle.fileno())
+            
+            self.logger.info("Successfully appended to file: %s", file_path)
+            return _OK
+            
+        except PermissionError as e:
+            self.logger.error("Permission denied appending to file: %s", file_path)
+            return FileOperationResult(
+                success=False, 
+                error=f"Permission denied. Check file permissions: {e}"
+            )
+            
+        except Exception as e:
+            self.logger.error("Unexpected error appending to file %s: %s", file_path, e)
+            return FileOperationResult(success=False, error=str(e))
+
+    def close_all(self):
+        """Flush and close any file handles held open by the manager"""
+        with self._handles_lock:
+            while self._handles:
+                _, handle = self._handles.popitem()
+                try:
+                    handle.close()
+                except Exception as e:
+                    self.logger.error("Error closing file handle %s: %s", handle.name, e)
@@ -2,12 +2,243 @@
 Enhanced therapy bot implementation with authentic therapeutic presence and improved session handling.
 """
 
+import asyncio
+import contextlib
+import importlib.util
+import io
+import json
 import logging
+import re
+import sys
+import threading
 from datetime import datetime
-from typing import Optional, Tuple
-from anthropic import Anthropic
+from typing import Any, AsyncContextManager, Callable, Dict, List, Optional, Set, Tuple
+import httpx
+from anthropic import AsyncAnthropic
 from config import ChatConfig, SessionState, TherapistPersona
 from file_manager import FileManager
+from response_cache import ResponseCache
+
+# Compiled once so each turn is a single C-level scan with no lowercased copies
+_GOODBYE_RE = re.compile(r"\b(?:bye|goodbye|see you|farewell|going now|leave)\b", re.IGNORECASE)
+_NAME_RE = re.compile(r"\b(?:i'?m|name is|call me|i am)\s+([^\W\d_][\w'-]*)", re.IGNORECASE)
+_GREETING_WORDS = frozenset({'hello', 'hi', 'hey', 'yes', 'no'})
+_SENTENCE_END_RE = re.compile(r"[.!?\n]")
+
+# json.dumps never leaves these quotes unescaped inside a string value, so the bytes
+# only occur in the type field of session start records
+_SESSION_START_MARKER = b'"type": "session_start"'
+
+# Layout of the plain-text history file written before the switch to JSONL
+_LEGACY_SESSION_RE = re.compile(r"^--- Session: (.*?) ---\nClient Name: (.*?)\n", re.MULTILINE)
+_LEGACY_TURN_RE = re.compile(r"\nUser: (.*?)\nEli: (.*?)\n\n(?=\nUser: |\n*\Z)", re.DOTALL)
+
+# HTTP/2 needs the optional h2 package; without it the pooled client stays on HTTP/1.1
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_LOGGER = logging.getLogger('TherapyBot')
+_LOGGER_LOCK = threading.Lock()
+
+def _init_logger() -> logging.Logger:
+    """Attach the console handler to the bot logger exactly once per process"""
+    with _LOGGER_LOCK:
+        if not _LOGGER.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter(
+                '{asctime} - {name} - {levelname} - {message}',
+                datefmt='%H:%M:%S',
+                style='{'
+            ))
+            _LOGGER.addHandler(handler)
+    return _LOGGER
+
+_init_logger()
+
+# Turn prompts are fixed templates built once; each turn only fills in the slots
+_FIRST_SESSION_PROMPT = """
+            Begin a new first-time therapy session with genuine warmth and presence.
+            This is a first-time session, so:
+            - Introduce yourself as Eli
+            - Ask for their name warmly
+            - Create a welcoming, safe space
+            - Explain how the sessions work
+            - Use natural, caring language
+            """
+
+_RETURNING_SESSION_PROMPT = """
+            Begin a returning therapy session with genuine warmth and presence.
+            The client's name is {client_name}.
+            Acknowledge previous sessions while focusing on the present moment.
+            Show your authentic therapeutic style in welcoming them back.
+            """
+
+_CHAT_PROMPT = f"""
+        Remember to:
+        - Respond with genuine therapeutic warmth
+        - Show thoughtful consideration
+        - Reference previous context naturally when relevant
+        - Maintain your authentic presence
+        {{name_hint}}
+        {{goodbye_hint}}
+        
+        Current client share: {{user_message}}
+        
+        Take a moment to consider your response, showing authentic therapeutic presence.
+        If the client is ending the session, instead give a warm, caring goodbye that
+        acknowledges their participation and leaves the door open for future sessions,
+        then end your reply with {TherapistPersona.SESSION_END_MARKER}.
+        """
+
+_NAME_HINT = "- Use their name ({client_name}) naturally and occasionally"
+_GOODBYE_HINT = "- The client may be saying goodbye"
+
+_SUMMARY_PROMPT = """
+        Update this summary of a therapy session so far with the new exchanges below.
+        Reply with at most three short bullet points preserving key facts, the client's
+        name if known, and the main emotional themes.
+        
+        Current summary: {summary}
+        
+        New exchanges:
+        {exchanges}
+        """
+
+_SESSION_CONTEXT = """
+        Previous Session Context:
+        Is First Session: {is_first_session}
+        Client Name: {{client_name}}
+        Current Session Type: {session_type}
+        Earlier In This Session: {{summary}}
+        
+        Remember to:
+        - Maintain your warm, authentic presence throughout
+        - Show natural thoughtfulness in your responses
+        - {name_reminder}
+        - Keep your therapeutic wisdom wrapped in genuine warmth
+        """
+
+# Session-type parts are folded in at import, leaving only the per-session slots
+_SESSION_CONTEXT_FIRST = _SESSION_CONTEXT.format(
+    is_first_session=True,
+    session_type="FIRST_SESSION_INTRODUCTION",
+    name_reminder="Ask for their name warmly"
+)
+_SESSION_CONTEXT_RETURNING = _SESSION_CONTEXT.format(
+    is_first_session=False,
+    session_type="RETURNING_SESSION_GREETING",
+    name_reminder="Use their name naturally"
+)
+
+def create_http_client(config: ChatConfig) -> httpx.AsyncClient:
+    """
+    Build the pooled HTTP client used for API requests
+    
+    Args:
+        config: Settings for timeouts, keep-alive and concurrency
+    
+    Returns:
+        httpx.AsyncClient: Client that keeps API connections warm between turns
+    """
+    return httpx.AsyncClient(
+        http2=_HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_keepalive_connections=max(4, config.max_concurrency),
+            keepalive_expiry=config.keepalive_expiry
+        ),
+        timeout=httpx.Timeout(
+            config.request_timeout,
+            connect=config.connect_timeout
+        )
+    )
+
+def _record_line(**fields: Any) -> str:
+    """Serialize one session file record as a JSON line"""
+    return json.dumps(fields, ensure_ascii=False) + "\n"
+
+def _convert_legacy_history(text: str) -> str:
+    """
+    Convert plain-text session history into session file records
+    
+    Args:
+        text: Contents of a history file in the pre-JSONL format
+    
+    Returns:
+        str: JSONL records, or an empty string if no sessions were found
+    """
+    headers = list(_LEGACY_SESSION_RE.finditer(text))
+    lines = []
+    for header, following in zip(headers, headers[1:] + [None]):
+        client_name = header.group(2).strip()
+        lines.append(_record_line(
+            type="session_start",
+            ts=header.group(1),
+            client_name=client_name if client_name not in ("", "None", "Unknown") else None
+        ))
+        body = text[header.end():following.start() if following else len(text)]
+        for turn in _LEGACY_TURN_RE.finditer(body):
+            lines.append(_record_line(type="turn", role="user", content=turn.group(1)))
+            lines.append(_record_line(type="turn", role="assistant", content=turn.group(2)))
+    return "".join(lines)
+
+def _render_records(data: str) -> str:
+    """
+    Render session file records as a readable transcript for the prompt
+    
+    Args:
+        data: JSONL text; blank or malformed lines (such as a cut first line) are skipped
+    
+    Returns:
+        str: Transcript with a header per session and one line per turn
+    """
+    parts = []
+    for line in data.splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if record.get("type") == "session_start":
+            parts.append(
+                f"\n--- Session: {record.get('ts')} ---\n"
+                f"Client Name: {record.get('client_name') or 'Unknown'}\n"
+            )
+        elif record.get("type") == "turn":
+            speaker = "User" if record.get("role") == "user" else TherapistPersona.NAME
+            parts.append(f"{speaker}: {record.get('content')}\n")
+    return "".join(parts)
+
+def _build_system_prompt(is_first_session: bool, client_name: Optional[str],
+                         previous_sessions: str, summary: str) -> Tuple[Dict[str, Any], ...]:
+    """
+    Assemble the system prompt blocks for one combination of session inputs
+    
+    Args:
+        is_first_session: Whether this is the client's first session
+        client_name: The client's name, if known
+        previous_sessions: Prior session history included for returning clients
+        summary: Digest of turns that have aged out of this session's messages
+    
+    Returns:
+        Tuple[Dict[str, Any], ...]: System content blocks, cacheable prefix first
+    """
+    if is_first_session:
+        persona_prompt, context_template = TherapistPersona.SYSTEM_PROMPT_FIRST, _SESSION_CONTEXT_FIRST
+    else:
+        persona_prompt, context_template = TherapistPersona.SYSTEM_PROMPT_RETURNING, _SESSION_CONTEXT_RETURNING
+    
+    blocks = [{"type": "text", "text": persona_prompt}]
+    if not is_first_session and previous_sessions:
+        blocks.append({
+            "type": "text",
+            "text": f"Previous Sessions:\n{previous_sessions}"
+        })
+    
+    # Persona and prior sessions stay fixed for the whole session, so a single
+    # breakpoint on the last of them lets the API serve that prefix from its cache
+    blocks[-1]["cache_control"] = {"type": "ephemeral"}
+    
+    session_context = context_template.format(client_name=client_name, summary=summary or "None")
+    blocks.append({"type": "text", "text": session_context})
+    return tuple(blocks)
 
 class TherapySession:
     """Manages the therapy session state and history"""
@@ -17,28 +248,84 @@ class TherapySession:
         
     def add_interaction(self, user_message: str, bot_response: str):
         """Add a new interaction to the session history"""
-        self.state.history += f"\nUser: {user_message}"
-        self.state.history += f"\nEli: {bot_response}\n\n"
+        self.state.history_chunks.append(_record_line(type="turn", role="user", content=user_message))
+        self.state.history_chunks.append(_record_line(type="turn", role="assistant", content=bot_response))
+        self.state.messages.append({"role": "user", "content": user_message})
+        self.state.messages.append({"role": "assistant", "content": bot_response})
 
     def clear(self):
         """Clear the session history and mark as inactive"""
-        self.state.history = ""
+        self.state.history_chunks.clear()
+        self.state.messages.clear()
+        self.state.summary = ""
         self.state.is_active = False
 
+class _EndMarkerFilter:
+    """Forwards streamed text while holding back the session-end marker"""
+    def __init__(self, on_text: Callable[[str], None]):
+        self.on_text = on_text
+        self.pending = ""
+
+    def __call__(self, text: str):
+        marker = TherapistPersona.SESSION_END_MARKER
+        self.pending = (self.pending + text).replace(marker, "")
+        
+        # Keep back any tail that could still grow into the marker
+        held = next(
+            (size for size in range(len(marker) - 1, 0, -1)
+             if self.pending.endswith(marker[:size])),
+            0
+        )
+        ready = self.pending[:len(self.pending) - held]
+        self.pending = self.pending[len(self.pending) - held:]
+        if ready:
+            self.on_text(ready)
+
+    def flush(self):
+        """Emit held-back text that turned out not to be the marker"""
+        if self.pending:
+            self.on_text(self.pending)
+            self.pending = ""
+
 class TherapyBot:
     """Main therapy chatbot class with enhanced authentic presence"""
-    def __init__(self, config: Optional[ChatConfig] = None):
+    def __init__(self, config: Optional[ChatConfig] = None,
+                 client: Optional[AsyncAnthropic] = None,
+                 request_limiter: Optional[AsyncContextManager] = None):
         """
         Initialize TherapyBot with configuration
         
         Args:
             config: Optional configuration override
+            client: Optional shared API client; the bot creates and owns one if omitted
+            request_limiter: Optional context manager held around each API request,
+                such as a semaphore shared by many bots
         """
         self.config = config or ChatConfig()
         self.setup_logging()
         
         self.session = TherapySession()
-        self.client = Anthropic(api_key=self.config.api_key)
+        # One pooled HTTP client for every turn keeps the API connection warm
+        self._http_client: Optional[httpx.AsyncClient] = None
+        if client is None:
+            self._http_client = create_http_client(self.config)
+            client = AsyncAnthropic(
+                api_key=self.config.api_key,
+                http_client=self._http_client
+            )
+        self.client = client
+        self._request_limiter = request_limiter or contextlib.nullcontext()
+        
+        # Session writes run as tasks that overlap the next turn; the lock keeps them ordered
+        self._pending_saves: Set[asyncio.Task] = set()
+        self._save_lock = asyncio.Lock()
+        
+        # At most one summarization runs at a time, alongside the conversation
+        self._compaction_task: Optional[asyncio.Task] = None
+        
+        # Last built system prompt and the session inputs it was built from
+        self._system_prompt_key: Optional[Tuple[bool, Optional[str], str]] = None
+        self._system_prompt: Tuple[Dict[str, Any], ...] = ()
         
         self.file_manager = FileManager(
             logger=self.logger,
@@ -46,66 +333,112 @@ class TherapyBot:
             default_content=self.config.default_session_content
         )
         
-        # Load previous sessions first
+        # Replays identical requests from disk; meant for development, off by default
+        self._response_cache: Optional[ResponseCache] = None
+        if self.config.enable_response_cache:
+            self._response_cache = ResponseCache(
+                self.config.cache_dir,
+                self.config.cache_ttl,
+                logger=self.logger
+            )
+        
+        # Carry history over from the plain-text format before anything reads it
+        self._migrate_legacy_history()
+        
+        # Load the recent end of previous sessions first
         self.previous_sessions = self._load_previous_sessions()
-        # Check if there's actual content beyond the default header
-        default_content = self.config.default_session_content.strip()
-        actual_content = self.previous_sessions.strip()
-        self.has_previous_sessions = bool(actual_content) and actual_content != default_content
         
-        # Extract previous client name if it exists
-        self.previous_client_name = self._extract_previous_client_name()
+        # Decide from the file itself; a single long turn can leave the tail window empty
+        last_session_start = self._load_last_session_start()
+        self.has_previous_sessions = (
+            last_session_start is not None or bool(self.previous_sessions.strip())
+        )
+        self.previous_client_name = (last_session_start or {}).get("client_name") or None
         
         # Set session state based on previous sessions
         self.session.state.is_first_session = not self.has_previous_sessions
         if not self.session.state.is_first_session:
             self.session.state.client_name = self.previous_client_name
             
-        self.logger.info(f"Session initialized - First session: {self.session.state.is_first_session}")
+        self.logger.info("Session initialized - First session: %s", self.session.state.is_first_session)
 
     def setup_logging(self):
         """Set up logging for the therapy bot"""
-        self.logger = logging.getLogger('TherapyBot')
-        if not self.logger.handlers:
-            handler = logging.StreamHandler()
-            formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
-            handler.setFormatter(formatter)
-            self.logger.addHandler(handler)
-            self.logger.setLevel(self.config.log_level)
+        self.logger = _init_logger()
+        self.logger.setLevel(self.config.log_level)
+
+    def _migrate_legacy_history(self):
+        """Convert a plain-text history file into the JSONL session file, once"""
+        legacy_file = self.config.legacy_session_file
+        session_file = self.config.session_file
+        if legacy_file is None or legacy_file == session_file or not legacy_file.is_file():
+            return
+        if session_file.is_file() and session_file.stat().st_size > 0:
+            return
+        
+        result = self.file_manager.read_file(legacy_file)
+        if not result.success:
+            self.logger.error("Failed to read legacy session history: %s", result.error)
+            return
+        
+        records = _convert_legacy_history(result.data or "")
+        if not records:
+            self.logger.warning("No sessions found in legacy history file: %s", legacy_file)
+            return
+        
+        result = self.file_manager.write_file(session_file, records)
+        if not result.success:
+            self.logger.error("Failed to write converted session history: %s", result.error)
+            return
+        self.logger.warning(
+            "Converted legacy session history %s into %s; the original file was left in place",
+            legacy_file, session_file
+        )
 
     def _load_previous_sessions(self) -> str:
         """
-        Load previous session history from file
+        Load the most recent previous session history from file
+        
+        Only the last max_history_bytes are kept, which bounds both memory
+        and the prompt tokens spent on history.
         
         Returns:
-            str: Previous session history or empty string if none exists
+            str: Previous session transcript or empty string if none exists
         """
-        result = self.file_manager.read_file(self.config.session_file)
+        result = self.file_manager.read_tail(
+            self.config.session_file,
+            self.config.max_history_bytes
+        )
         
         if not result.success:
-            self.logger.error(f"Failed to load sessions: {result.error}")
+            self.logger.error("Failed to load sessions: %s", result.error)
             return ""
             
         if result.was_created:
-            self.logger.info(f"Created new session file: {self.config.session_file}")
+            self.logger.info("Created new session file: %s", self.config.session_file)
             
-        return result.data or ""
+        return _render_records(result.data or "")
 
-    def _extract_previous_client_name(self) -> Optional[str]:
-        """Extract client name from previous sessions if it exists."""
-        if not self.previous_sessions:
+    def _load_last_session_start(self) -> Optional[Dict[str, Any]]:
+        """
+        Find the most recent session start record in the history file
+        
+        Returns:
+            Optional[Dict[str, Any]]: The record, or None if there is no previous session
+        """
+        # Only the most recent session start record is needed, so read from the end
+        result = self.file_manager.find_last_line(self.config.session_file, _SESSION_START_MARKER)
+        if not result.success:
+            self.logger.error("Failed to read previous session: %s", result.error)
+            return None
+        if not result.data:
+            return None
+        
+        try:
+            return json.loads(result.data)
+        except ValueError as e:
+            self.logger.error("Malformed session record: %s", e)
             return None
-            
-        import re
-        # Look for the most recent client name entry
-        matches = re.findall(r"Client Name: (.*?)\n", self.previous_sessions)
-        if matches:
-            last_name = matches[-1].strip()
-            return last_name if last_name != "None" else None
-            
-        return None
 
     def _extract_name_from_response(self, response: str) -> Optional[str]:
         """
@@ -118,93 +451,123 @@ class TherapyBot:
             Optional[str]: Extracted name if found, None otherwise
         """
         # Look for common name-giving patterns
-        lower_response = response.lower()
-        name_indicators = ["i'm ", "im ", "name is ", "call me ", "i am "]
-        
-        for indicator in name_indicators:
-            if indicator in lower_response:
-                # Get the word following the indicator
-                idx = lower_response.index(indicator) + len(indicator)
-                name = response[idx:].split()[0].strip('.,!?')
-                return name.capitalize()
-        
+        match = _NAME_RE.search(response)
+        if match:
+            return match.group(1).capitalize()
+
         # If no pattern found, return the first word (assuming direct name response)
-        first_word = response.split()[0].strip('.,!?')
-        if first_word and not first_word.lower() in ['hello', 'hi', 'hey', 'yes', 'no']:
+        words = response.split(None, 1)  # Only the first word is needed
+        first_word = words[0].strip('.,!?') if words else ""
+        if first_word and first_word.lower() not in _GREETING_WORDS:
             return first_word.capitalize()
             
         return None
 
-    def _get_system_prompt(self) -> str:
+    def _get_system_prompt(self) -> Tuple[Dict[str, Any], ...]:
         """
         Generate the system prompt with enhanced personality guidance
         
         Returns:
-            str: Complete system prompt with personality and context
+            Tuple[Dict[str, Any], ...]: System content blocks, cacheable prefix first
         """
-        # Ensure we're using the correct session type prompt
-        session_type = "FIRST_SESSION_INTRODUCTION" if self.session.state.is_first_session else "RETURNING_SESSION_GREETING"
-        
-        session_context = f"""
-        Previous Session Context:
-        Is First Session: {self.session.state.is_first_session}
-        Client Name: {self.session.state.client_name}
-        Previous Sessions: {self.previous_sessions if not self.session.state.is_first_session else "None"}
-        Current Session Type: {session_type}
-        
-        Session Instructions:
-        {TherapistPersona.FIRST_SESSION_INTRODUCTION if self.session.state.is_first_session 
-         else TherapistPersona.RETURNING_SESSION_GREETING}
+        state = self.session.state
+        # The inputs only change when the client name is learned or the history is
+        # summarized, so most turns reuse the previous build
+        key = (state.is_first_session, state.client_name, state.summary)
+        if key != self._system_prompt_key:
+            self._system_prompt = _build_system_prompt(
+                state.is_first_session,
+                state.client_name,
+                self.previous_sessions,
+                state.summary
+            )
+            self._system_prompt_key = key
+        return self._system_prompt
+
+    def _build_messages(self, prompt: str) -> List[Dict[str, Any]]:
         """
+        Build the API message list from the session's turns plus the new prompt
         
-        return f"""
-        {TherapistPersona.PERSONALITY}
-        
-        {TherapistPersona.RELATIONSHIP_GUIDELINES}
-        
-        {TherapistPersona.AUTHENTICITY_MARKERS}
-        
-        {session_context}
-        
-        Remember to:
-        - Maintain your warm, authentic presence throughout
-        - Show natural thoughtfulness in your responses
-        - {'Ask for their name warmly' if self.session.state.is_first_session else 'Use their name naturally'}
-        - Keep your therapeutic wisdom wrapped in genuine warmth
+        Args:
+            prompt: The new user turn to append
         
-        {TherapistPersona.RULES}
+        Returns:
+            List[Dict[str, Any]]: Conversation messages ending with the new turn
         """
+        messages: List[Dict[str, Any]] = list(self.session.state.messages)
+        if messages:
+            # Mark the end of the prior conversation so it is read from the prompt cache
+            last = messages[-1]
+            messages[-1] = {
+                "role": last["role"],
+                "content": [{
+                    "type": "text",
+                    "text": last["content"],
+                    "cache_control": {"type": "ephemeral"}
+                }]
+            }
+        messages.append({"role": "user", "content": prompt})
+        return messages
 
-    def _generate_response(self, prompt: str) -> str:
+    async def _generate_response(self, prompt: str,
+                                 on_text: Optional[Callable[[str], None]] = None) -> str:
         """
-        Generate a response using the Claude API
+        Generate a response using the Claude API, streaming it as it is produced
         
         Args:
-            prompt: The input prompt for response generation
-            
+            prompt: The new user turn, sent after the session's prior messages
+            on_text: Optional callback receiving each text fragment as it arrives
+        
         Returns:
             str: Generated response text
         """
+        request = {
+            "model": self.config.model_name,
+            "max_tokens": self.config.max_tokens,
+            "system": self._get_system_prompt(),
+            "temperature": self.config.temperature,
+            "messages": self._build_messages(prompt),
+        }
+        
+        cache_key = None
+        if self._response_cache:
+            # sqlite queries and commits block, so they run off the event loop
+            cache_key = ResponseCache.make_key(**request)
+            cached = await asyncio.to_thread(self._response_cache.get, cache_key)
+            if cached is not None:
+                if on_text:
+                    on_text(cached)
+                return cached
+        
+        chunks = []
         try:
-            response = self.client.messages.create(
-                model=self.config.model_name,
-                max_tokens=self.config.max_tokens,
-                system=self._get_system_prompt(),
-                temperature=self.config.temperature,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            return response.content[0].text
+            async with self._request_limiter, self.client.messages.stream(**request) as stream:
+                async for text in stream.text_stream:
+                    chunks.append(text)
+                    if on_text:
+                        on_text(text)
+            response = "".join(chunks)
+            if cache_key:
+                await asyncio.to_thread(self._response_cache.set, cache_key, response)
+            return response
         except Exception as e:
-            self.logger.error(f"Error generating response: {e}")
-            return "I apologize, but I'm having trouble formulating my response right now. Could we pause for a moment and try again?"
+            self.logger.error("Error generating response: %s", e)
+            fallback = "I apologize, but I'm having trouble formulating my response right now. Could we pause for a moment and try again?"
+            if on_text:
+                on_text(fallback)
+            return fallback
 
-    def start_session(self) -> str:
+    async def start_session(self, on_text: Optional[Callable[[str], None]] = None) -> str:
         """
         Start a new therapy session with authentic warmth
         
+        Args:
+            on_text: Optional callback receiving the greeting as it streams
+        
         Returns:
             str: Initial session greeting
         """
+        self._cancel_compaction()
         self.session = TherapySession()
         # Ensure first session state is properly set
         self.session.state.is_first_session = not self.has_previous_sessions
@@ -214,33 +577,22 @@ class TherapyBot:
             self.session.state.client_name = self.previous_client_name
         
         if self.session.state.is_first_session:
-            prompt = """
-            Begin a new first-time therapy session with genuine warmth and presence.
-            This is a first-time session, so:
-            - Introduce yourself as Eli
-            - Ask for their name warmly
-            - Create a welcoming, safe space
-            - Explain how the sessions work
-            - Use natural, caring language
-            """
+            prompt = _FIRST_SESSION_PROMPT
         else:
-            prompt = f"""
-            Begin a returning therapy session with genuine warmth and presence.
-            The client's name is {self.previous_client_name}.
-            Acknowledge previous sessions while focusing on the present moment.
-            Show your authentic therapeutic style in welcoming them back.
-            """
+            prompt = _RETURNING_SESSION_PROMPT.format(client_name=self.previous_client_name)
         
-        response = self._generate_response(prompt)
+        response = await self._generate_response(prompt, on_text)
         self.session.add_interaction("New session started", response)
         return response
 
-    def chat(self, user_message: str) -> Tuple[str, bool]:
+    async def chat(self, user_message: str,
+                   on_text: Optional[Callable[[str], None]] = None) -> Tuple[str, bool]:
         """
         Process user message with authentic therapeutic presence
         
         Args:
             user_message: The user's input message
+            on_text: Optional callback receiving the response as it streams
             
         Returns:
             Tuple[str, bool]: (response message, whether session has ended)
@@ -251,118 +603,248 @@ class TherapyBot:
         # Try to extract name if this is first session and we don't have it yet
         if (self.session.state.is_first_session and 
             not self.session.state.client_name and 
-            len(self.session.state.history) > 0):  # Not the first message
+            self.session.state.history_chunks):  # Not the first message
             extracted_name = self._extract_name_from_response(user_message)
             if extracted_name:
                 self.session.state.client_name = extracted_name
 
-        # Check for goodbye indicators
-        goodbye_indicators = ['bye', 'goodbye', 'see you', 'farewell', 'going now', 'leave']
-        is_goodbye = any(indicator in user_message.lower() for indicator in goodbye_indicators)
-
-        if is_goodbye:
-            goodbye_prompt = f"""
-            The client is saying goodbye.
-            Create a warm, caring goodbye that:
-            - Acknowledges their participation
-            - Shows genuine care
-            - Leaves the door open for future sessions
-            - Maintains your authentic therapeutic presence
-            {f'- Uses their name ({self.session.state.client_name}) naturally in farewell'
-              if self.session.state.client_name else ''}
-            
-            Their closing message: {user_message}
-            """
-            goodbye_message = self._generate_response(goodbye_prompt)
-            self.session.add_interaction(user_message, goodbye_message)
+        # Goodbye indicators only hint at the intent; the model confirms it with the marker
+        is_goodbye = _GOODBYE_RE.search(user_message) is not None
+        end_marker = TherapistPersona.SESSION_END_MARKER
+        client_name = self.session.state.client_name
+
+        base_prompt = _CHAT_PROMPT.format(
+            name_hint=_NAME_HINT.format(client_name=client_name) if client_name else '',
+            goodbye_hint=_GOODBYE_HINT if is_goodbye else '',
+            user_message=user_message
+        )
+
+        marker_filter = _EndMarkerFilter(on_text) if on_text else None
+        response = await self._generate_response(base_prompt, marker_filter)
+        if marker_filter:
+            marker_filter.flush()
+        
+        session_ended = end_marker in response
+        if session_ended:
+            response = response.replace(end_marker, "").rstrip()
+        
+        self.session.add_interaction(user_message, response)
+        if session_ended:
+            self._cancel_compaction()
             self._save_session()
             self.session.clear()
-            return goodbye_message, True
+        else:
+            self._schedule_compaction()
+        return response, session_ended
 
-        # Regular conversation handling
-        base_prompt = f"""
-        Current session context:
-        Is First Session: {self.session.state.is_first_session}
-        Client Name: {self.session.state.client_name}
-        Session History: {self.session.state.history}
+    def _schedule_compaction(self):
+        """Start summarizing the oldest turns in the background once the window is full"""
+        if self._compaction_task and not self._compaction_task.done():
+            return
         
-        Remember to:
-        - Respond with genuine therapeutic warmth
-        - Show thoughtful consideration
-        - Reference previous context naturally when relevant
-        - Maintain your authentic presence
-        {f'- Use their name ({self.session.state.client_name}) naturally and occasionally' 
-          if self.session.state.client_name else ''}
+        state = self.session.state
+        # Each turn is a user message followed by an assistant message
+        if len(state.messages) <= 2 * self.config.max_recent_turns:
+            return
         
-        Current client share: {user_message}
+        self._compaction_task = asyncio.create_task(self._compact_history(state))
+
+    def _cancel_compaction(self):
+        """Drop any in-flight summarization; its session is over"""
+        if self._compaction_task:
+            self._compaction_task.cancel()
+            self._compaction_task = None
+
+    async def _compact_history(self, state: SessionState):
+        """
+        Fold the oldest verbatim turns into the session summary
         
-        Take a moment to consider your response, showing authentic therapeutic presence.
+        Args:
+            state: Session state to compact; turns added meanwhile are kept
         """
+        batch = state.messages[:2 * self.config.summarize_batch_size]
+        summary = await self._summarize_turns(state.summary, batch)
+        if summary is not None:
+            # New turns are only ever appended, so the batch is still the oldest prefix
+            state.summary = summary
+            del state.messages[:len(batch)]
 
-        response = self._generate_response(base_prompt)
-        self.session.add_interaction(user_message, response)
-        return response, False
+    async def _summarize_turns(self, summary: str,
+                               messages: List[Dict[str, str]]) -> Optional[str]:
+        """
+        Condense older conversation turns into a short digest using the summary model
+        
+        Args:
+            summary: Existing digest of even earlier turns, possibly empty
+            messages: Verbatim user/assistant messages to fold into the digest
+        
+        Returns:
+            Optional[str]: Updated digest, or None if summarization failed
+        """
+        exchanges = "\n".join(
+            f"{'User' if message['role'] == 'user' else 'Eli'}: {message['content']}"
+            for message in messages
+        )
+        prompt = _SUMMARY_PROMPT.format(summary=summary or "None", exchanges=exchanges)
+        try:
+            async with self._request_limiter:
+                response = await self.client.messages.create(
+                    model=self.config.summary_model,
+                    max_tokens=self.config.summary_max_tokens,
+                    messages=[{"role": "user", "content": prompt}]
+                )
+            return response.content[0].text.strip()
+        except Exception as e:
+            self.logger.error("Error summarizing session history: %s", e)
+            return None
 
     def _save_session(self):
-        """Save the current session to the history file"""
+        """Queue the current session to be appended to the history file"""
         try:
             # Use previous client name if current session doesn't have one
-            client_name = (
-                self.session.state.client_name or 
-                self.previous_client_name or 
-                "Unknown"  # Use "Unknown" instead of None
-            )
+            client_name = self.session.state.client_name or self.previous_client_name
             
-            updated_history = (
-                self.previous_sessions + 
-                f"\n\n--- Session: {self.session.start_time} ---\n" +
-                f"Client Name: {client_name}\n" +
-                self.session.state.history
-            )
+            # Only the new session is appended; earlier history stays on disk as-is
+            session_record = "".join([
+                _record_line(type="session_start", ts=self.session.start_time,
+                             client_name=client_name),
+                *self.session.state.history_chunks
+            ])
             
-            result = self.file_manager.write_file(
-                self.config.session_file, 
-                updated_history
+            # The record is captured now; the disk write runs off the event loop
+            task = asyncio.create_task(self._persist_session_record(session_record))
+            self._pending_saves.add(task)
+            task.add_done_callback(self._pending_saves.discard)
+        
+        except Exception as e:
+            self.logger.error("Unexpected error saving session: %s", e)
+
+    async def _persist_session_record(self, session_record: str):
+        """Write a session record in a worker thread, one record at a time"""
+        async with self._save_lock:
+            await asyncio.to_thread(self._write_session_record, session_record)
+
+    def _write_session_record(self, session_record: str):
+        """Append a finished session record to the history file"""
+        try:
+            # One fsync per session makes the record durable without syncing every write
+            result = self.file_manager.append_file(
+                self.config.session_file,
+                session_record,
+                sync=True
             )
             
             if not result.success:
-                self.logger.error(f"Failed to save session: {result.error}")
-                
+                self.logger.error("Failed to save session: %s", result.error)
+        
         except Exception as e:
-            self.logger.error(f"Unexpected error saving session: {e}")
+            self.logger.error("Unexpected error saving session: %s", e)
 
-def main():
-    """Main function to run the therapy chatbot"""
+    async def close(self):
+        """Wait for pending session writes and release open files and connections"""
+        self._cancel_compaction()
+        if self._pending_saves:
+            await asyncio.gather(*self._pending_saves)
+        self.file_manager.close_all()
+        if self._response_cache:
+            self._response_cache.close()
+        # A shared client belongs to whoever passed it in
+        if self._http_client:
+            await self._http_client.aclose()
+
+class _ConsoleWriter:
+    """Coalesces streamed response fragments and writes them a sentence at a time"""
+    def __init__(self, out: Optional[io.TextIOBase] = None):
+        self.out = out or sys.stdout
+        self.pending: List[str] = []
+
+    def __call__(self, text: str):
+        self.pending.append(text)
+        if _SENTENCE_END_RE.search(text):
+            self.flush()
+
+    def flush(self):
+        """Write out everything held back and push it to the terminal"""
+        if self.pending:
+            self.out.write("".join(self.pending))
+            self.pending.clear()
+        self.out.flush()
+
+def _settle(future: asyncio.Future, result: Optional[str], error: Optional[BaseException]):
+    """Complete a pending input future unless it was already cancelled"""
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+async def _read_input() -> str:
+    """Read a line from stdin without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    line = loop.create_future()
+
+    def read():
+        try:
+            result, error = input(), None
+        except Exception as e:
+            result, error = None, e
+        try:
+            loop.call_soon_threadsafe(_settle, line, result, error)
+        except RuntimeError:
+            pass  # The loop already closed after an interrupt
+
+    # A daemon thread, unlike asyncio.to_thread, never holds up exit after Ctrl+C
+    threading.Thread(target=read, daemon=True).start()
+    return await line
+
+async def run_bot():
+    """Run the therapy chatbot conversation loop"""
     # Initialize the bot with default configuration
     bot = TherapyBot()
-    
+
     print("\n=== Starting New Therapy Session ===\n")
-    
-    # Start the session
-    initial_response = bot.start_session()
-    print(initial_response)
 
-    # Main conversation loop
-    while True:
-        try:
-            print("\n> ", end='')  # Add the input line prompt
-            user_input = input().strip()
-            if not user_input:
-                continue
+    # Streamed text is flushed per sentence by the console writer; other output
+    # keeps the default buffering so status and error lines appear promptly
+    console = _ConsoleWriter()
 
-            response, session_ended = bot.chat(user_input)
-            print(f"\n{response}")  # Add newline before response
-            
-            if session_ended:
-                print("\n=== Session Ended ===\n")
-                break
+    try:
+        # Start the session, streaming the greeting
+        await bot.start_session(on_text=console)
+        console.flush()
+        print()
+        
+        # Main conversation loop
+        while True:
+            try:
+                print("\n> ", end='')  # Add the input line prompt
+                user_input = (await _read_input()).strip()
+                if not user_input:
+                    continue
                 
-        except KeyboardInterrupt:
-            print("\n\n=== Session Interrupted ===\n")
-            break
-        except Exception as e:
-            print(f"\nAn error occurred: {e}")
-            print("Please try again.")
+                print()  # Add newline before response
+                _, session_ended = await bot.chat(user_input, on_text=console)
+                console.flush()
+                print()
+                
+                if session_ended:
+                    print("\n=== Session Ended ===\n")
+                    break
+                    
+            except Exception as e:
+                print(f"\nAn error occurred: {e}")
+                print("Please try again.")
+    finally:
+        # Let any in-flight session save finish before exiting
+        await bot.close()
+
+def main():
+    """Main function to run the therapy chatbot"""
+    try:
+        asyncio.run(run_bot())
+    except KeyboardInterrupt:
+        print("\n\n=== Session Interrupted ===\n")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
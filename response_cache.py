@@ -0,0 +1,83 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+class ResponseCache:
+    """Stores model responses on disk, keyed by a hash of the full request"""
+
+    def __init__(self, cache_dir: Path, ttl: float,
+                 logger: Optional[logging.Logger] = None):
+        """
+        Open (or create) the cache database and drop expired entries
+        
+        Args:
+            cache_dir: Directory holding the cache database
+            ttl: Seconds a cached response stays valid
+            logger: Optional logger for cache errors
+        """
+        self.ttl = ttl
+        self.logger = logger or logging.getLogger('ResponseCache')
+        
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Opened wherever the bot is built but used from other threads; the lock
+        # keeps those uses one at a time
+        self._db = sqlite3.connect(cache_dir / "responses.sqlite3", check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, text TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        self._db.execute("DELETE FROM responses WHERE expires <= ?", (time.time(),))
+        self._db.commit()
+
+    @staticmethod
+    def make_key(**request: Any) -> str:
+        """
+        Hash a request into a cache key
+        
+        Args:
+            **request: The API request parameters
+        
+        Returns:
+            str: Hex digest identifying the request
+        """
+        payload = json.dumps(request, sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=32).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None if missing or expired"""
+        try:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT text FROM responses WHERE key = ? AND expires > ?",
+                    (key, time.time())
+                ).fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            self.logger.error("Error reading response cache: %s", e)
+            return None
+
+    def set(self, key: str, text: str):
+        """Store a response under a key until the TTL passes"""
+        try:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+                    (key, text, time.time() + self.ttl)
+                )
+                self._db.commit()
+        except sqlite3.Error as e:
+            self.logger.error("Error writing response cache: %s", e)
+
+    def close(self):
+        """Close the cache database"""
+        try:
+            with self._lock:
+                self._db.close()
+        except sqlite3.Error as e:
+            self.logger.error("Error closing response cache: %s", e)
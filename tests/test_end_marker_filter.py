@@ -0,0 +1,54 @@
+import unittest
+
+from config import TherapistPersona
+from main import _EndMarkerFilter
+
+_MARKER = TherapistPersona.SESSION_END_MARKER
+
+class EndMarkerFilterTest(unittest.TestCase):
+    """Tests for _EndMarkerFilter"""
+
+    def setUp(self):
+        self.emitted = []
+        self.filter = _EndMarkerFilter(self.emitted.append)
+
+    def _feed(self, *chunks):
+        for chunk in chunks:
+            self.filter(chunk)
+        self.filter.flush()
+        return "".join(self.emitted)
+
+    def test_text_without_marker_passes_through(self):
+        self.assertEqual(self._feed("Hello ", "there."), "Hello there.")
+
+    def test_marker_split_across_chunks_is_dropped(self):
+        for split in range(1, len(_MARKER)):
+            with self.subTest(split=split):
+                self.emitted.clear()
+                output = self._feed("Take care.", " " + _MARKER[:split], _MARKER[split:])
+                self.assertEqual(output, "Take care. ")
+
+    def test_marker_split_over_single_characters_is_never_emitted(self):
+        self.filter("Bye. ")
+        for char in _MARKER:
+            self.filter(char)
+        self.assertEqual("".join(self.emitted), "Bye. ")
+        self.filter.flush()
+        self.assertEqual("".join(self.emitted), "Bye. ")
+
+    def test_marker_as_the_last_chunk(self):
+        self.assertEqual(self._feed("Goodbye for now. ", _MARKER), "Goodbye for now. ")
+
+    def test_partial_marker_at_the_end_is_flushed(self):
+        self.filter("Almost " + _MARKER[:3])
+        self.assertEqual("".join(self.emitted), "Almost ")
+        self.filter.flush()
+        self.assertEqual("".join(self.emitted), "Almost " + _MARKER[:3])
+
+    def test_partial_marker_is_released_once_it_cannot_match(self):
+        self.filter("a " + _MARKER[:3])
+        self.filter("ough said")
+        self.assertEqual("".join(self.emitted), "a " + _MARKER[:3] + "ough said")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+
+from file_manager import FileManager
+
+# No handlers attached, so INFO messages stay out of the test output
+_QUIET_LOGGER = logging.getLogger('tests.file_manager')
+
+class ReadTailTest(unittest.TestCase):
+    """Tests for FileManager.read_tail"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "history.jsonl"
+        self.fm = FileManager(logger=_QUIET_LOGGER)
+
+    def tearDown(self):
+        self.fm.close_all()
+        self.tmp.cleanup()
+
+    def test_small_file_is_returned_whole(self):
+        self.path.write_bytes(b"first\nsecond\n")
+        result = self.fm.read_tail(self.path, 1024)
+        self.assertTrue(result.success)
+        self.assertEqual(result.data, "first\nsecond\n")
+
+    def test_truncated_window_starts_on_a_line_boundary(self):
+        self.path.write_bytes(b"aaaaaaaaaa\nbbbb\ncccc\n")
+        result = self.fm.read_tail(self.path, 8)
+        self.assertEqual(result.data, "cccc\n")
+
+    def test_window_without_newline_is_empty(self):
+        self.path.write_bytes(b"x" * 100)
+        result = self.fm.read_tail(self.path, 10)
+        self.assertTrue(result.success)
+        self.assertEqual(result.data, "")
+
+    def test_window_holding_only_the_end_of_a_long_line_is_empty(self):
+        self.path.write_bytes(b'{"type": "session_start"}\n' + b"y" * 1000 + b"\n")
+        result = self.fm.read_tail(self.path, 100)
+        self.assertEqual(result.data, "")
+
+    def test_split_multibyte_character_is_dropped_with_the_partial_line(self):
+        self.path.write_bytes("ééééé\nok\n".encode("utf-8"))
+        result = self.fm.read_tail(self.path, 5)
+        self.assertTrue(result.success)
+        self.assertEqual(result.data, "ok\n")
+
+    def test_missing_file_is_created(self):
+        missing = Path(self.tmp.name) / "nested" / "new.jsonl"
+        result = self.fm.read_tail(missing, 10)
+        self.assertTrue(result.success)
+        self.assertTrue(result.was_created)
+        self.assertEqual(result.data, "")
+        self.assertTrue(missing.exists())
+
+class FindLastLineTest(unittest.TestCase):
+    """Tests for FileManager.find_last_line"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "history.jsonl"
+        self.fm = FileManager(logger=_QUIET_LOGGER)
+
+    def tearDown(self):
+        self.fm.close_all()
+        self.tmp.cleanup()
+
+    def test_missing_file_has_no_match(self):
+        result = self.fm.find_last_line(self.path, b"start")
+        self.assertTrue(result.success)
+        self.assertIsNone(result.data)
+
+    def test_no_matching_line(self):
+        self.path.write_bytes(b"one\ntwo\n")
+        self.assertIsNone(self.fm.find_last_line(self.path, b"start").data)
+
+    def test_returns_the_last_match_for_any_chunk_size(self):
+        self.path.write_bytes("start Ann\nturn\nstart Zoë\nturn ü\n".encode("utf-8"))
+        for chunk_size in (1, 2, 3, 7, 64 * 1024):
+            with self.subTest(chunk_size=chunk_size):
+                result = self.fm.find_last_line(self.path, b"start", chunk_size=chunk_size)
+                self.assertEqual(result.data, "start Zoë")
+
+    def test_match_on_the_first_line(self):
+        self.path.write_bytes(b"start first\nturn\nturn\n")
+        result = self.fm.find_last_line(self.path, b"start", chunk_size=4)
+        self.assertEqual(result.data, "start first")
+
+    def test_match_before_a_line_longer_than_the_chunk(self):
+        self.path.write_bytes(b"start Sam\n" + b"z" * 5000 + b"\n")
+        result = self.fm.find_last_line(self.path, b"start", chunk_size=64)
+        self.assertEqual(result.data, "start Sam")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import json
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+
+from config import ChatConfig
+from main import TherapyBot, _convert_legacy_history
+
+# Two sessions as the plain-text format wrote them: a file header, then per
+# session a header and "User"/"Eli" turns each followed by a blank line
+_LEGACY_HISTORY = (
+    "# Therapy Session History\n\n"
+    "\n\n--- Session: 2024-05-01T10:00:00 ---\n"
+    "Client Name: Unknown\n"
+    "\nUser: New session started"
+    "\nEli: Hello, I'm Eli. What should I call you?\n\n"
+    "\nUser: I'm Sam"
+    "\nEli: Welcome, Sam.\n\nTake all the time you need.\n\n"
+    "\nUser: bye"
+    "\nEli: Take care, Sam. <END>\n\n"
+    "\n\n--- Session: 2024-05-08T09:30:00 ---\n"
+    "Client Name: Sam\n"
+    "\nUser: New session started"
+    "\nEli: Welcome back, Sam.\n\n"
+)
+
+def _records(text):
+    return [json.loads(line) for line in text.splitlines()]
+
+class ConvertLegacyHistoryTest(unittest.TestCase):
+    """Tests for _convert_legacy_history"""
+
+    def test_sessions_and_turns_become_records(self):
+        records = _records(_convert_legacy_history(_LEGACY_HISTORY))
+        self.assertEqual(
+            [(record["type"], record.get("role")) for record in records],
+            [("session_start", None)] + [("turn", "user"), ("turn", "assistant")] * 3
+            + [("session_start", None), ("turn", "user"), ("turn", "assistant")]
+        )
+        self.assertEqual(records[0]["ts"], "2024-05-01T10:00:00")
+        self.assertEqual(records[7]["ts"], "2024-05-08T09:30:00")
+
+    def test_multi_line_reply_is_kept_whole(self):
+        records = _records(_convert_legacy_history(_LEGACY_HISTORY))
+        self.assertEqual(records[4]["content"], "Welcome, Sam.\n\nTake all the time you need.")
+        self.assertEqual(records[5]["content"], "bye")
+
+    def test_client_names_are_carried_over(self):
+        starts = [
+            record for record in _records(_convert_legacy_history(_LEGACY_HISTORY))
+            if record["type"] == "session_start"
+        ]
+        self.assertEqual([record["client_name"] for record in starts], [None, "Sam"])
+
+    def test_text_without_sessions_converts_to_nothing(self):
+        self.assertEqual(_convert_legacy_history("# Therapy Session History\n\n"), "")
+
+class MigrateLegacyHistoryTest(unittest.TestCase):
+    """Tests for the one-time conversion when a TherapyBot starts"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        directory = Path(self.tmp.name)
+        self.session_file = directory / "sessions.jsonl"
+        self.legacy_file = directory / "ps.txt"
+        self.legacy_file.write_text(_LEGACY_HISTORY, encoding="utf-8")
+        self.config = ChatConfig(
+            session_file=self.session_file,
+            legacy_session_file=self.legacy_file,
+            api_key="test-key",
+            log_level=logging.WARNING
+        )
+        self.bots = []
+
+    def tearDown(self):
+        for bot in self.bots:
+            bot.file_manager.close_all()
+        self.tmp.cleanup()
+
+    def _start_bot(self) -> TherapyBot:
+        # No request is made while the bot is built, so it needs no real client
+        bot = TherapyBot(self.config, client=object())
+        self.bots.append(bot)
+        return bot
+
+    def test_history_is_converted_on_first_start(self):
+        with self.assertLogs('TherapyBot', level='WARNING'):
+            bot = self._start_bot()
+        
+        self.assertEqual(
+            self.session_file.read_text(encoding="utf-8"),
+            _convert_legacy_history(_LEGACY_HISTORY)
+        )
+        self.assertEqual(self.legacy_file.read_text(encoding="utf-8"), _LEGACY_HISTORY)
+        self.assertTrue(bot.has_previous_sessions)
+        self.assertEqual(bot.previous_client_name, "Sam")
+
+    def test_conversion_does_not_run_again(self):
+        with self.assertLogs('TherapyBot', level='WARNING'):
+            self._start_bot()
+        converted = self.session_file.read_text(encoding="utf-8")
+        
+        with self.assertNoLogs('TherapyBot', level='WARNING'):
+            self._start_bot()
+        self.assertEqual(self.session_file.read_text(encoding="utf-8"), converted)
+
+    def test_existing_session_file_is_left_alone(self):
+        existing = '{"type": "session_start", "ts": "2024-06-01", "client_name": "Alex"}\n'
+        self.session_file.write_text(existing, encoding="utf-8")
+        
+        with self.assertNoLogs('TherapyBot', level='WARNING'):
+            bot = self._start_bot()
+        self.assertEqual(self.session_file.read_text(encoding="utf-8"), existing)
+        self.assertEqual(bot.previous_client_name, "Alex")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from config import ChatConfig
+from main import TherapyBot
+from therapy_service import TherapyService
+
+class _StubStream:
+    """Streams a canned reply, optionally waiting before the first fragment"""
+    def __init__(self, client, request):
+        self.client = client
+        self.request = request
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    async def text_stream(self):
+        client = self.client
+        client.in_flight += 1
+        client.max_in_flight = max(client.max_in_flight, client.in_flight)
+        try:
+            await client.delay(self.request)
+            yield client.reply(self.request)
+        finally:
+            client.in_flight -= 1
+
+class _StubMessages:
+    def __init__(self, client):
+        self.client = client
+
+    def stream(self, **request):
+        self.client.requests.append(request)
+        return _StubStream(self.client, request)
+
+class _StubClient:
+    """Stands in for AsyncAnthropic, recording each streamed request"""
+    def __init__(self):
+        self.messages = _StubMessages(self)
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.replies = []
+
+    async def delay(self, request):
+        await asyncio.sleep(0)
+
+    def reply(self, request):
+        return self.replies.pop(0) if self.replies else f"reply {len(self.requests)}"
+
+def _last_prompt(request) -> str:
+    return request["messages"][-1]["content"]
+
+class TherapyServiceTest(unittest.IsolatedAsyncioTestCase):
+    """Tests for TherapyService with a stub API client"""
+
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.service = TherapyService(ChatConfig(
+            sessions_dir=Path(self.tmp.name),
+            api_key="test-key",
+            log_level=logging.WARNING
+        ))
+        self.client = self.service.client = _StubClient()
+
+    async def asyncTearDown(self):
+        await self.service.close()
+        self.tmp.cleanup()
+
+    async def test_turns_on_one_session_run_in_order(self):
+        await self.service.start_session("client-1")
+        
+        # The first turn is held up, so without the lock the second would overtake it
+        async def delay(request):
+            await asyncio.sleep(0.05 if "first" in _last_prompt(request) else 0)
+        self.client.delay = delay
+        
+        await asyncio.gather(
+            self.service.chat("client-1", "first"),
+            self.service.chat("client-1", "second")
+        )
+        
+        self.assertEqual(self.client.max_in_flight, 1)
+        first, second = self.client.requests[1:]
+        self.assertIn("first", _last_prompt(first))
+        self.assertIn("second", _last_prompt(second))
+        # The second turn is sent with the first exchange already in the conversation
+        self.assertEqual(len(second["messages"]), len(first["messages"]) + 2)
+
+    async def test_chat_many_runs_sessions_concurrently(self):
+        await asyncio.gather(
+            self.service.start_session("client-1"),
+            self.service.start_session("client-2")
+        )
+        
+        # Each reply waits until both requests are in flight
+        both_started = asyncio.Event()
+        async def delay(request):
+            if self.client.in_flight == 2:
+                both_started.set()
+            await asyncio.wait_for(both_started.wait(), timeout=1)
+        self.client.delay = delay
+        
+        results = await self.service.chat_many({"client-1": "Hi", "client-2": "Hello"})
+        
+        self.assertEqual(self.client.max_in_flight, 2)
+        self.assertEqual(set(results), {"client-1", "client-2"})
+        self.assertFalse(any(ended for _, ended in results.values()))
+
+    async def test_chat_after_the_session_ended(self):
+        await self.service.start_session("client-1")
+        self.client.replies.append("Take care. <END>")
+        
+        response, ended = await self.service.chat("client-1", "bye")
+        self.assertEqual((response, ended), ("Take care.", True))
+        self.assertNotIn("client-1", self.service.bots)
+        self.assertNotIn("client-1", self.service._session_locks)
+        
+        response, ended = await self.service.chat("client-1", "are you there?")
+        self.assertEqual(response, "Session has ended. Please start a new session.")
+        self.assertTrue(ended)
+        self.assertEqual(len(self.client.requests), 2)
+
+    async def test_restart_right_after_the_session_ended(self):
+        await self.service.start_session("client-1")
+        await self.service.chat("client-1", "I'm Sam")
+        self.client.replies.append("Goodbye, Sam. <END>")
+        
+        # Hold the history write back so the restart would overtake it
+        write_session_record = TherapyBot._write_session_record
+        def slow_write(bot, session_record):
+            time.sleep(0.1)
+            write_session_record(bot, session_record)
+        
+        with mock.patch.object(TherapyBot, "_write_session_record", slow_write):
+            _, ended = await self.service.chat("client-1", "bye")
+            self.assertTrue(ended)
+            await self.service.start_session("client-1")
+        
+        bot = self.service.bots["client-1"]
+        self.assertFalse(bot.session.state.is_first_session)
+        self.assertEqual(bot.previous_client_name, "Sam")
+        self.assertIn("The client's name is Sam", _last_prompt(self.client.requests[-1]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import asyncio
+import contextlib
+import dataclasses
+import re
+from typing import AsyncIterator, Dict, Optional, Tuple
+from anthropic import AsyncAnthropic
+from config import ChatConfig
+from main import TherapyBot, create_http_client
+
+# Session ids become file names, so keep them to a safe character set
+_SESSION_ID_RE = re.compile(r"[\w-]+")
+
+class TherapyService:
+    """Hosts many therapy sessions in one process over a shared API client"""
+
+    def __init__(self, config: Optional[ChatConfig] = None):
+        """
+        Initialize the service with configuration shared by all sessions
+        
+        Args:
+            config: Optional configuration override
+        """
+        self.config = config or ChatConfig()
+        
+        # Every session multiplexes its requests over the same pooled connections
+        self._http_client = create_http_client(self.config)
+        self.client = AsyncAnthropic(
+            api_key=self.config.api_key,
+            http_client=self._http_client
+        )
+        
+        # Caps in-flight API requests across all sessions; the rest wait their turn
+        self._request_limiter = asyncio.Semaphore(self.config.max_concurrency)
+        
+        self.bots: Dict[str, TherapyBot] = {}
+        # One turn at a time per session; a bot's state is not safe to interleave.
+        # Each lock lives only while its session is open or someone is waiting on it
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        self._session_lock_users: Dict[str, int] = {}
+        # Close of an ended session, which saves its history, keyed by session id
+        self._closing: Dict[str, asyncio.Task] = {}
+
+    def _create_bot(self, session_id: str) -> TherapyBot:
+        """Create a bot for one client, keeping its history in its own file"""
+        if not _SESSION_ID_RE.fullmatch(session_id):
+            raise ValueError(f"Invalid session id: {session_id!r}")
+        
+        # The single-client legacy history must not be copied into every client's file
+        config = dataclasses.replace(
+            self.config,
+            session_file=self.config.sessions_dir / f"{session_id}.jsonl",
+            legacy_session_file=None
+        )
+        return TherapyBot(
+            config,
+            client=self.client,
+            request_limiter=self._request_limiter
+        )
+
+    @contextlib.asynccontextmanager
+    async def _session_turn(self, session_id: str) -> AsyncIterator[None]:
+        """Hold a session's lock, dropping the lock once the session is gone and unused"""
+        lock = self._session_locks.setdefault(session_id, asyncio.Lock())
+        self._session_lock_users[session_id] = self._session_lock_users.get(session_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._session_lock_users[session_id] -= 1
+            if not self._session_lock_users[session_id] and session_id not in self.bots:
+                del self._session_lock_users[session_id]
+                del self._session_locks[session_id]
+
+    async def start_session(self, session_id: str) -> str:
+        """
+        Start (or restart) the therapy session for a client
+        
+        Args:
+            session_id: Identifier of the client's session
+        
+        Returns:
+            str: Initial session greeting
+        """
+        async with self._session_turn(session_id):
+            bot = self.bots.get(session_id)
+            if bot is None:
+                # The previous session's save must land before the new bot reads the history
+                closing = self._closing.get(session_id)
+                if closing is not None:
+                    await asyncio.wait([closing])
+                
+                # Construction reads the history file, so keep it off the event loop
+                bot = await asyncio.to_thread(self._create_bot, session_id)
+                self.bots[session_id] = bot
+            return await bot.start_session()
+
+    async def chat(self, session_id: str, user_message: str) -> Tuple[str, bool]:
+        """
+        Process one message for a client's session
+        
+        Args:
+            session_id: Identifier of the client's session
+            user_message: The user's input message
+        
+        Returns:
+            Tuple[str, bool]: (response message, whether session has ended)
+        """
+        async with self._session_turn(session_id):
+            # Looked up under the lock so a turn queued behind the ending one sees it gone
+            bot = self.bots.get(session_id)
+            if bot is None:
+                return "Session has ended. Please start a new session.", True
+            
+            response, session_ended = await bot.chat(user_message)
+            if session_ended:
+                # Release the finished session without holding up its reply
+                self.bots.pop(session_id, None)
+                task = self._closing[session_id] = asyncio.create_task(bot.close())
+                task.add_done_callback(lambda _: self._closing.pop(session_id, None))
+            return response, session_ended
+
+    async def chat_many(self, messages: Dict[str, str]) -> Dict[str, Tuple[str, bool]]:
+        """
+        Process messages for several sessions concurrently
+        
+        Args:
+            messages: User message keyed by session id
+        
+        Returns:
+            Dict[str, Tuple[str, bool]]: Chat result keyed by session id
+        """
+        results = await asyncio.gather(*(
+            self.chat(session_id, user_message)
+            for session_id, user_message in messages.items()
+        ))
+        return dict(zip(messages, results))
+
+    async def close(self):
+        """Close every hosted session, wait for their saves, and release connections"""
+        bots, self.bots = list(self.bots.values()), {}
+        try:
+            await asyncio.gather(*(bot.close() for bot in bots), *self._closing.values())
+        finally:
+            await self._http_client.aclose()